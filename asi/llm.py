@@ -1,21 +1,19 @@
 import requests
 import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-# Retrieve API key
-api_key = os.getenv("ASI1_LLM_API_KEY")
+from functools import lru_cache
 
 # ASI1-Mini LLM API endpoint
 url = "https://api.asi1.ai/v1/chat/completions"
 
-# Define headers for API requests
-headers = {
-    "Content-Type": "application/json",
-    "Authorization": f"Bearer {api_key}"
-}
+@lru_cache(maxsize=None)
+def get_headers():
+    """Reads the API key and builds the request headers on the first query,
+    so importing this module stays cheap"""
+    api_key = os.getenv("ASI1_LLM_API_KEY")
+    return {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}"
+    }
 
 def query_llm(query):
     """Query ASI1-Mini LLM with a given prompt"""
@@ -26,9 +24,9 @@ def query_llm(query):
     }
 
     try:
-        with requests.post(url, headers=headers, json=data) as response:
+        with requests.post(url, headers=get_headers(), json=data) as response:
             output = response.json()
             return output["choices"][0]["message"]["content"]
-    
+
     except requests.exceptions.RequestException as e:
-        return str(e)
\ No newline at end of file
+        return str(e)
@@ -0,0 +1,154 @@
+"""Cold start benchmark for every agent.
+
+Starts each agent in a fresh interpreter next to a client agent in a local
+Bureau and splits the time until the client receives the answer to its
+first message into importing uagents (the same for every agent and outside
+this repo's control), importing the agent module, and starting the Bureau
+up to the answered first message.
+
+    python benchmarks/cold_start.py --runs 5
+    python benchmarks/cold_start.py --agents market-data-agent,risk-agent --online
+
+By default the data agents use their mock data so the numbers measure
+startup rather than upstream APIs; --online keeps the real fetchers.
+Almanac registration and the Agentverse status calls uagents makes before
+the startup handlers are always skipped: they are network round trips (or
+a ~33s DNS timeout offline) that would otherwise hide everything else.
+--tree runs the agents of another checkout, e.g. a baseline worktree:
+
+    git worktree add /tmp/baseline <commit>
+    python benchmarks/cold_start.py --tree /tmp/baseline
+
+Message models are looked up on the agent module itself, so trees that
+still define them per agent work too. Agents without the request model
+(main.py before the recommendation query protocol) report import times only.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# agent -> (path, request model, request fields, response model)
+AGENTS = {
+    "main": ("main.py", "RecommendationQuery", {}, "RecommendationQueryResponse"),
+    "news-agent": ("news-agent/agent.py", "NewsRequest", {"limit": 1}, "NewsResponse"),
+    "market-data-agent": ("market-data-agent/agent.py", "MarketRequest", {"coin_ids": ["bitcoin"]}, "MarketResponse"),
+    "fear-greed-agent": ("fear-greed-agent/agent.py", "FearGreedRequest", {}, "FearGreedResponse"),
+    "risk-agent": ("risk-agent/agent.py", "RiskRequest", {}, "RiskResponse"),
+}
+
+# Mock fetchers used instead of the upstream APIs unless --online is given
+OFFLINE_FETCHERS = {
+    "news-agent": ("get_crypto_news", "get_mock_news"),
+    "market-data-agent": ("get_market_data", "get_mock_market_data"),
+}
+
+def skip_registration():
+    """Replaces the network calls uagents makes on startup with no-ops"""
+    from uagents import Agent, Bureau
+
+    async def events_disabled(agent):
+        agent._events_enabled = False
+
+    async def no_op(*args, **kwargs):
+        pass
+
+    Agent._update_agent_status = no_op
+    Agent._resolve_events_enabled = events_disabled
+    Agent.start_registration_loop = lambda agent: None
+    Bureau._schedule_registration = no_op
+
+def child(name: str, tree: str, port: int, online: bool):
+    """Runs inside the fresh interpreter started by measure()"""
+    start = float(os.environ["COLD_START_T0"])
+    path, request_name, request_fields, response_name = AGENTS[name]
+    if not online:
+        os.environ.setdefault("FEAR_GREED_SOURCES", "stub")
+
+    import uagents  # noqa: F401
+    uagents_imported = time.time()
+
+    sys.path.insert(0, tree)
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_"), os.path.join(tree, path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    imported = time.time()
+
+    if not online and name in OFFLINE_FETCHERS:
+        fetcher, mock = OFFLINE_FETCHERS[name]
+        setattr(module, fetcher, getattr(module, mock))
+
+    from uagents import Agent, Bureau, Context
+    skip_registration()
+
+    timings = {"uagents": uagents_imported - start, "import": imported - uagents_imported}
+    request_model = getattr(module, request_name, None)
+    response_model = getattr(module, response_name, None)
+    if request_model is None or response_model is None:
+        print(json.dumps(dict(timings, startup=None, total=None)), flush=True)
+        os._exit(0)
+    client = Agent(name="cold-start-client", seed="cold start client benchmark seed")
+
+    @client.on_event("startup")
+    async def send_first_message(ctx: Context):
+        await ctx.send(module.agent.address, request_model(**request_fields))
+
+    @client.on_message(model=response_model)
+    async def handle_first_answer(ctx: Context, sender: str, msg: response_model):
+        answered = time.time()
+        print(json.dumps(dict(timings, startup=answered - imported, total=answered - start)), flush=True)
+        os._exit(0)
+
+    bureau = Bureau(port=port, endpoint=f"http://127.0.0.1:{port}/submit")
+    bureau.add(module.agent)
+    bureau.add(client)
+    bureau.run()
+
+def measure(name: str, tree: str, port: int, online: bool, timeout: float) -> dict:
+    """Starts the agent in a fresh interpreter and returns its timings in seconds"""
+    command = [sys.executable, os.path.abspath(__file__), "--child", name, "--tree", tree, "--port", str(port)]
+    if online:
+        command.append("--online")
+    env = dict(os.environ, COLD_START_T0=repr(time.time()))
+    result = subprocess.run(command, env=env, capture_output=True, text=True, timeout=timeout)
+    for line in reversed(result.stdout.splitlines()):
+        if line.startswith("{"):
+            return json.loads(line)
+    raise RuntimeError(f"{name} did not answer:\n{result.stdout}\n{result.stderr}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--agents", default=",".join(AGENTS))
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--online", action="store_true", help="query the real upstream APIs")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--tree", default=ROOT, help="checkout whose agents are started")
+    parser.add_argument("--port", type=int, default=8200)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, os.path.abspath(args.tree), args.port, args.online)
+        return
+
+    columns = ("uagents", "import", "startup", "total")
+    print(f"{'agent':<20}" + "".join(f"{column + ' (ms)':>20}" for column in columns))
+    for name in args.agents.split(","):
+        runs = [measure(name, os.path.abspath(args.tree), args.port, args.online, args.timeout)
+                for _ in range(args.runs)]
+        cells = []
+        for column in columns:
+            if runs[0][column] is None:
+                cells.append(f"{'n/a':>20}")
+            else:
+                cells.append(f"{statistics.median(run[column] for run in runs) * 1000:>20.1f}")
+        print(f"{name:<20}" + "".join(cells))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Overhead of the opt-in instrumentation in shared/instrumentation.py.
+
+Measures the cost added to each call by @timed and measure(), and the
+loop time taken by each event loop lag sample, then relates both to a
+handler of --handler-ms milliseconds wrapped --wrappers times (a data agent
+times the handler, process_response, the upstream fetch and ctx.send).
+
+    python benchmarks/instrumentation_overhead.py --handler-ms 1
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["TRADEANGEL_METRICS"] = "1"
+
+from shared import instrumentation
+
+async def handler():
+    pass
+
+def fetch():
+    pass
+
+async def measured_send():
+    with instrumentation.measure("ctx.send"):
+        await handler()
+
+def per_call_us(make_call, calls: int, repeats: int) -> float:
+    """Median microseconds per call of the coroutine function or function"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        if asyncio.iscoroutinefunction(make_call):
+            async def run():
+                for _ in range(calls):
+                    await make_call()
+            asyncio.run(run())
+        else:
+            for _ in range(calls):
+                make_call()
+        timings.append((time.perf_counter() - start) / calls * 1e6)
+    return statistics.median(timings)
+
+async def sampler_cost_us(seconds: float) -> float:
+    """Microseconds of loop time per lag sample, from running the sampler
+    back to back on an otherwise idle loop"""
+    before = instrumentation.metrics.snapshot().get("event_loop_lag")
+    sampler = asyncio.ensure_future(instrumentation.monitor_loop_lag(interval=1e-9))
+    await asyncio.sleep(seconds)
+    sampler.cancel()
+    after = instrumentation.metrics.snapshot()["event_loop_lag"]
+    return seconds / (after.count - (before.count if before else 0)) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seconds", type=float, default=2.0, help="duration of each lag sampler cost run")
+    parser.add_argument("--handler-ms", type=float, default=1.0, help="reference handler duration")
+    parser.add_argument("--wrappers", type=int, default=4, help="instrumented calls per handled message")
+    args = parser.parse_args()
+
+    timed_handler = instrumentation.timed("handler")(handler)
+    timed_fetch = instrumentation.timed("fetch")(fetch)
+    async_cost = per_call_us(timed_handler, args.calls, args.repeats) - per_call_us(handler, args.calls, args.repeats)
+    sync_cost = per_call_us(timed_fetch, args.calls, args.repeats) - per_call_us(fetch, args.calls, args.repeats)
+    measure_cost = per_call_us(measured_send, args.calls, args.repeats) - per_call_us(handler, args.calls, args.repeats)
+
+    sample_cost = statistics.median(asyncio.run(sampler_cost_us(args.seconds)) for _ in range(args.repeats))
+    sampler_overhead = sample_cost / (instrumentation.LOOP_LAG_INTERVAL * 1e6) * 100
+
+    worst_cost = max(async_cost, sync_cost, measure_cost)
+    handler_overhead = args.wrappers * worst_cost / (args.handler_ms * 1000) * 100
+    print(f"@timed async:        {async_cost:.2f} us/call")
+    print(f"@timed sync:         {sync_cost:.2f} us/call")
+    print(f"measure():           {measure_cost:.2f} us/call")
+    print(f"lag sampler:         {sample_cost:.2f} us/sample every {instrumentation.LOOP_LAG_INTERVAL}s "
+          f"= {sampler_overhead:.4f}% of the loop")
+    print(f"per message:         {handler_overhead:.3f}% of a {args.handler_ms}ms handler "
+          f"with {args.wrappers} instrumented calls")
+    print(f"total:               {handler_overhead + sampler_overhead:.3f}%")
+
+if __name__ == "__main__":
+    main()
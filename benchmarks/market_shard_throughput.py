@@ -0,0 +1,127 @@
+"""Aggregate throughput of sharded market data replicas in a local Bureau.
+
+Runs N market data replicas (mock data, simulated upstream latency) and a
+client that splits MarketRequests over them with the same ShardTracker as
+main.py, then reports coins served per second. Use --sweep to compare
+replica counts, and --silent to make replicas stop answering halfway so
+their shards get rebalanced.
+
+    python benchmarks/market_shard_throughput.py --sweep 1,2,4,8
+    python benchmarks/market_shard_throughput.py --replicas 4 --silent 1
+"""
+import argparse
+import asyncio
+import importlib.util
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def load_market_agent():
+    """Imports market-data-agent/agent.py for its models and mock data"""
+    spec = importlib.util.spec_from_file_location("market_data_agent", os.path.join(ROOT, "market-data-agent", "agent.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def run(args):
+    from uagents import Agent, Bureau, Context
+    from shared.sharding import ShardTracker
+
+    market = load_market_agent()
+    coins = [f"coin-{i}" for i in range(args.coins)]
+    replicas = [Agent(name=f"market-replica-{i}", seed=f"market replica {i} benchmark seed")
+                for i in range(args.replicas)]
+    silent = {replica.address for replica in replicas[:args.silent]}
+    state = {"round": 0, "served": 0}
+
+    def add_replica_handler(replica):
+        @replica.on_message(model=market.MarketRequest)
+        async def handle_market_request(ctx: Context, sender: str, msg: market.MarketRequest):
+            if replica.address in silent and state["round"] >= args.rounds // 2:
+                return
+            # Stands in for the upstream API call, which scales with the number of coins
+            await asyncio.sleep(args.request_latency + args.coin_latency * len(msg.coin_ids))
+            await ctx.send(sender, market.MarketResponse(
+                data=market.get_mock_market_data(msg.coin_ids),
+                status="success",
+                timestamp=datetime.now().isoformat(),
+                coin_ids=msg.coin_ids
+            ))
+
+    for replica in replicas:
+        add_replica_handler(replica)
+
+    client = Agent(name="shard-client", seed="shard client benchmark seed")
+    tracker = ShardTracker([replica.address for replica in replicas], timeout=args.timeout)
+    round_done = asyncio.Event()
+
+    @client.on_message(model=market.MarketResponse)
+    async def handle_market_response(ctx: Context, sender: str, msg: market.MarketResponse):
+        if tracker.receive(sender, msg.data, msg.coin_ids):
+            round_done.set()
+
+    async def send_shards(ctx, shards):
+        await asyncio.gather(*(ctx.send(address, market.MarketRequest(coin_ids=shard))
+                               for address, shard in shards.items()))
+
+    @client.on_event("startup")
+    async def start(ctx: Context):
+        asyncio.ensure_future(run_rounds(ctx))
+
+    async def run_rounds(ctx: Context):
+        await asyncio.sleep(1.0)  # Let the bureau finish starting up
+        start_time = time.perf_counter()
+        for round_number in range(args.rounds):
+            state["round"] = round_number
+            round_done.clear()
+            await send_shards(ctx, tracker.dispatch(coins))
+            while not round_done.is_set():
+                try:
+                    await asyncio.wait_for(round_done.wait(), timeout=args.timeout / 4)
+                except asyncio.TimeoutError:
+                    reassigned = tracker.expire()
+                    await send_shards(ctx, reassigned)
+                    if tracker.complete:
+                        round_done.set()
+            state["served"] += len(tracker.parts)
+        elapsed = time.perf_counter() - start_time
+        print(f"replicas={args.replicas} silent={args.silent} rounds={args.rounds} "
+              f"coins/round={args.coins} served={state['served']} "
+              f"elapsed={elapsed:.2f}s throughput={state['served'] / elapsed:,.0f} coins/s", flush=True)
+        os._exit(0)
+
+    bureau = Bureau(port=args.port, endpoint=f"http://127.0.0.1:{args.port}/submit")
+    for agent in replicas + [client]:
+        bureau.add(agent)
+    bureau.run()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--replicas", type=int, default=2)
+    parser.add_argument("--sweep", help="comma separated replica counts, each run in its own process")
+    parser.add_argument("--silent", type=int, default=0, help="replicas that stop answering halfway")
+    parser.add_argument("--coins", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--request-latency", type=float, default=0.05, help="seconds per upstream request")
+    parser.add_argument("--coin-latency", type=float, default=0.002, help="extra seconds per coin")
+    parser.add_argument("--timeout", type=float, default=2.0, help="seconds before a shard is reassigned")
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+
+    if args.sweep:
+        for i, replicas in enumerate(args.sweep.split(",")):
+            command = [sys.executable, __file__, "--replicas", replicas, "--silent", str(args.silent),
+                       "--coins", str(args.coins), "--rounds", str(args.rounds),
+                       "--request-latency", str(args.request_latency), "--coin-latency", str(args.coin_latency),
+                       "--timeout", str(args.timeout), "--port", str(args.port + i)]
+            subprocess.run(command, check=True)
+    else:
+        run(args)
+
+if __name__ == "__main__":
+    main()
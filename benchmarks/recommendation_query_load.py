@@ -0,0 +1,95 @@
+"""Load test for the recommendation index.
+
+Hammers RecommendationIndex.query from several threads while a refresh loop
+keeps publishing new recommendation cycles, then reports query throughput and
+latency percentiles.
+
+    python benchmarks/recommendation_query_load.py --seconds 5 --threads 4
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from query.index import RecommendationIndex
+
+ACTIONS = ["BUY", "SELL", "HOLD"]
+
+@dataclass
+class Recommendation:
+    # Same fields as main.CryptoRecommendation, without needing uagents installed
+    coin: str
+    action: str
+    confidence: float
+    reasoning: str
+    timestamp: str
+
+def make_cycle(coins):
+    return [Recommendation(
+        coin=coin,
+        action=random.choice(ACTIONS),
+        confidence=round(random.random(), 2),
+        reasoning="Benchmark recommendation.",
+        timestamp=datetime.now().isoformat()
+    ) for coin in coins]
+
+def refresh_loop(index, coins, users, period, stop):
+    while not stop.is_set():
+        for user in users:
+            index.publish(make_cycle(coins), user=user)
+        time.sleep(period)
+
+def query_loop(index, coins, users, stop, latencies):
+    queries = [
+        lambda: index.query(coin=random.choice(coins), user=random.choice(users)),
+        lambda: index.query(user=random.choice(users), action=random.choice(ACTIONS)),
+        lambda: index.query(user=random.choice(users), min_confidence=0.5),
+        lambda: index.query(coin=random.choice(coins), user=random.choice(users), include_history=True, limit=10),
+    ]
+    while not stop.is_set():
+        query = random.choice(queries)
+        start = time.perf_counter()
+        query()
+        latencies.append(time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--coins", type=int, default=50)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--refresh", type=float, default=0.01, help="seconds between refresh cycles")
+    args = parser.parse_args()
+
+    coins = [f"coin-{i}" for i in range(args.coins)]
+    users = [f"user-{i}" for i in range(args.users)]
+    index = RecommendationIndex()
+    for user in users:
+        index.publish(make_cycle(coins), user=user)
+
+    stop = threading.Event()
+    per_thread = [[] for _ in range(args.threads)]
+    threads = [threading.Thread(target=refresh_loop, args=(index, coins, users, args.refresh, stop))]
+    threads += [threading.Thread(target=query_loop, args=(index, coins, users, stop, latencies))
+                for latencies in per_thread]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latencies = sorted(l for thread_latencies in per_thread for l in thread_latencies)
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1e6
+    print(f"queries:      {len(latencies)} in {args.seconds:.1f}s ({len(latencies) / args.seconds:,.0f}/s)")
+    print(f"refreshes:    {index.cycle} cycles")
+    print(f"latency (us): p50={pct(0.50):.1f} p99={pct(0.99):.1f} max={latencies[-1] * 1e6:.1f}")
+
+if __name__ == "__main__":
+    main()
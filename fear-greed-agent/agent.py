@@ -1,62 +1,134 @@
+import os
+import sys
+
+# Make the shared modules importable when running `python <agent>/agent.py`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 from uagents import Agent, Context
-from pydantic import BaseModel
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional
+import asyncio
+import time
 import requests
 from datetime import datetime
+from shared.instrumentation import instrument, measure, timed
+from shared.models import FearGreedRequest, FearGreedData, FearGreedSourceData, FearGreedResponse
 
 agent = Agent(name="Crypto Fear & Greed Agent")
 
-# Models
-class FearGreedRequest(BaseModel):
-    limit: Optional[int] = 1 # Limit the number of returned results
+# Comma separated list of enabled sources, see SOURCES below
+FEAR_GREED_SOURCES = os.getenv("FEAR_GREED_SOURCES", "alternative.me,coinmarketcap,cryptopanic")
+# Seconds to wait for sources before answering with whatever arrived
+FEAR_GREED_DEADLINE = float(os.getenv("FEAR_GREED_DEADLINE", "3.0"))
+# A reading this old (in seconds) counts half as much as a fresh one
+FRESHNESS_HALF_LIFE = float(os.getenv("FEAR_GREED_HALF_LIFE", str(24 * 60 * 60)))
+
+# Source registry
+class FearGreedSource:
+    def __init__(self, name: str, fetch: Callable[[int], List[FearGreedData]], weight: float, is_mock: bool,
+                 api_key_env: Optional[str]):
+        self.name = name
+        self.fetch = fetch
+        self.weight = weight
+        self.is_mock = is_mock
+        self.api_key_env = api_key_env
+
+    @property
+    def configured(self) -> bool:
+        return self.api_key_env is None or bool(os.getenv(self.api_key_env))
+
+SOURCES: Dict[str, FearGreedSource] = {}
 
-class FearGreedData(BaseModel):
-    value: float
-    value_classification: str
-    timestamp: str
+def register_source(name: str, weight: float = 1.0, is_mock: bool = False, api_key_env: Optional[str] = None):
+    """Registers a Fear & Greed provider. The provider takes a limit and returns
+    the newest readings first, raising an exception when it has no data.
+    Providers needing an API key are skipped while api_key_env is unset."""
+    def decorator(fetch: Callable[[int], List[FearGreedData]]):
+        SOURCES[name] = FearGreedSource(name, fetch, weight, is_mock, api_key_env)
+        return fetch
+    return decorator
 
-class FearGreedResponse(BaseModel):
-    data: List[FearGreedData]
-    status: str
-    timestamp: str
+def classify(value: float) -> str:
+    """Maps a 0-100 index value to the Alternative.me classification"""
+    if value < 25:
+        return "Extreme Fear"
+    elif value < 47:
+        return "Fear"
+    elif value < 55:
+        return "Neutral"
+    elif value < 76:
+        return "Greed"
+    return "Extreme Greed"
 
+@register_source("alternative.me", weight=1.0)
 def get_fear_greed_index(limit: int = 1) -> List[FearGreedData]:
     """Fetch Fear & Greed Index from Alternative.me API"""
-    url = f"https://api.alternative.me/fng/?limit={limit}"
-    
-    try:
-        params = {
-            "limit": limit
-        }
-        response = requests.get(url, params=params)
-        
-        if response.status_code == 200:
-            data = response.json()
-            fgi_data = []
-            
-            for item in data.get('data', [])[:limit]:
-                # Convert value to float
-                value = float(item.get('value', 0))
-                
-                # Determine classification
-                classification = item.get('value_classification', '')
-                
-                # Timestamp
-                timestamp = datetime.fromtimestamp(int(item.get('timestamp', 0))).isoformat()
-                
-                fgi_data.append(FearGreedData(
-                    value=value,
-                    value_classification=classification,
-                    timestamp=timestamp
-                ))
-            
-            return fgi_data
-        else:
-            return get_mock_fear_greed_index(limit)
-    except Exception as e:
-        print(f"Error fetching fear & greed index: {e}")
-        return get_mock_fear_greed_index(limit)
+    url = "https://api.alternative.me/fng/"
+    response = requests.get(url, params={"limit": limit}, timeout=FEAR_GREED_DEADLINE)
+
+    if response.status_code != 200:
+        raise Exception(f"Alternative.me returned {response.status_code}")
+
+    fgi_data = []
+    for item in response.json().get('data', [])[:limit]:
+        fgi_data.append(FearGreedData(
+            value=float(item.get('value', 0)),
+            value_classification=item.get('value_classification', ''),
+            timestamp=datetime.fromtimestamp(int(item.get('timestamp', 0))).isoformat()
+        ))
+    return fgi_data
+
+@register_source("coinmarketcap", weight=1.0, api_key_env="CMC_API_KEY")
+def get_coinmarketcap_fear_greed_index(limit: int = 1) -> List[FearGreedData]:
+    """Fetch Fear & Greed Index from CoinMarketCap API"""
+    # Get an API key at https://coinmarketcap.com/api/
+    api_key = os.getenv("CMC_API_KEY")
+
+    url = "https://pro-api.coinmarketcap.com/v3/fear-and-greed/historical"
+    response = requests.get(url, params={"limit": limit}, headers={"X-CMC_PRO_API_KEY": api_key},
+                            timeout=FEAR_GREED_DEADLINE)
+
+    if response.status_code != 200:
+        raise Exception(f"CoinMarketCap returned {response.status_code}")
+
+    fgi_data = []
+    for item in response.json().get('data', [])[:limit]:
+        value = float(item.get('value', 0))
+        fgi_data.append(FearGreedData(
+            value=value,
+            value_classification=item.get('value_classification') or classify(value),
+            timestamp=datetime.fromtimestamp(int(item.get('timestamp', 0))).isoformat()
+        ))
+    return fgi_data
+
+@register_source("cryptopanic", weight=0.5, api_key_env="CRYPTOPANIC_API_KEY")
+def get_news_sentiment_index(limit: int = 1) -> List[FearGreedData]:
+    """Derive a 0-100 sentiment reading from CryptoPanic community votes"""
+    # Get an API key at https://cryptopanic.com/developers/api/
+    api_key = os.getenv("CRYPTOPANIC_API_KEY")
+
+    url = "https://cryptopanic.com/api/v1/posts/"
+    response = requests.get(url, params={"auth_token": api_key, "kind": "news"}, timeout=FEAR_GREED_DEADLINE)
+
+    if response.status_code != 200:
+        raise Exception(f"CryptoPanic returned {response.status_code}")
+
+    positive = negative = 0
+    for item in response.json().get('results', []):
+        votes = item.get('votes', {})
+        positive += votes.get('positive', 0) + votes.get('liked', 0)
+        negative += votes.get('negative', 0) + votes.get('disliked', 0) + votes.get('toxic', 0)
+    if positive + negative == 0:
+        raise Exception("CryptoPanic returned no votes")
 
+    # Only the current reading is available, so limit is capped at 1
+    value = round(100 * positive / (positive + negative), 1)
+    return [FearGreedData(
+        value=value,
+        value_classification=classify(value),
+        timestamp=datetime.now().isoformat()
+    )]
+
+@register_source("stub", weight=1.0, is_mock=True)
 def get_mock_fear_greed_index(limit: int = 1) -> List[FearGreedData]:
     """Generate mock Fear & Greed Index data for testing"""
     classifications = ["Neutral", "Greed", "Extreme Greed"]
@@ -72,22 +144,157 @@ def get_mock_fear_greed_index(limit: int = 1) -> List[FearGreedData]:
     
     return mock_data
 
+@register_source("stub-slow", weight=1.0, is_mock=True)
+def get_slow_mock_fear_greed_index(limit: int = 1) -> List[FearGreedData]:
+    """Mock source that answers after the deadline, for testing partial results"""
+    time.sleep(float(os.getenv("FEAR_GREED_STUB_DELAY", str(FEAR_GREED_DEADLINE * 2))))
+    return get_mock_fear_greed_index(limit)
+
+@register_source("stub-error", weight=1.0, is_mock=True)
+def get_failing_fear_greed_index(limit: int = 1) -> List[FearGreedData]:
+    """Mock source that always fails, for testing error handling"""
+    raise Exception("stub-error source always fails")
+
+def _timed_fetch(source: FearGreedSource, limit: int):
+    """Runs a source in a worker thread, returning its data and latency"""
+    start = time.perf_counter()
+    with measure(f"source.{source.name}"):
+        data = source.fetch(limit)
+    return data, (time.perf_counter() - start) * 1000
+
+@timed("gather_sources")
+async def gather_sources(limit: int, names: List[str], deadline: float) -> List[tuple]:
+    """Fetches all sources concurrently and returns (source, data, latency_ms, status)
+    for each one. Sources that miss the deadline are reported as timeouts, so the
+    total latency is bounded by the deadline rather than the slowest provider."""
+    loop = asyncio.get_running_loop()
+    futures = {}
+    results = []
+    for name in names:
+        source = SOURCES.get(name)
+        if source is None:
+            print(f"Unknown fear & greed source: {name}")
+        elif not source.configured:
+            # Missing API key, reported but not counted as a failure
+            results.append((source, [], None, "unconfigured"))
+        else:
+            futures[loop.run_in_executor(None, _timed_fetch, source, limit)] = source
+
+    if not futures:
+        return results
+    done, _ = await asyncio.wait(futures.keys(), timeout=deadline)
+
+    for future, source in futures.items():
+        if future not in done:
+            # The worker thread finishes on its own, its result is discarded
+            results.append((source, [], None, "timeout"))
+        elif future.exception() is not None:
+            print(f"Error fetching fear & greed index from {source.name}: {future.exception()}")
+            results.append((source, [], None, "error"))
+        else:
+            data, latency_ms = future.result()
+            results.append((source, data, latency_ms, "ok" if data else "error"))
+    return results
+
+def _age_seconds(timestamp: str, now: datetime) -> float:
+    try:
+        return max(0.0, (now - datetime.fromisoformat(timestamp)).total_seconds())
+    except ValueError:
+        return FRESHNESS_HALF_LIFE
+
+def aggregate(results: List[tuple], limit: int) -> tuple:
+    """Combines source readings into one weighted, freshness-decayed series.
+
+    Mock readings only count when no live source answered, so a placeholder
+    never gets blended into a live value. Returns (data, sources, provenance)."""
+    now = datetime.now()
+    live_answered = any(not source.is_mock and status == "ok" for source, _, _, status in results)
+    if live_answered:
+        blended = [result for result in results if not result[0].is_mock]
+    else:
+        blended = results
+    sources = []
+    for source, data, latency_ms, status in results:
+        entry = FearGreedSourceData(
+            source=source.name,
+            status=status,
+            latency_ms=round(latency_ms, 1) if latency_ms is not None else None,
+            is_mock=source.is_mock
+        )
+        if data:
+            entry.value = data[0].value
+            entry.age_seconds = round(_age_seconds(data[0].timestamp, now), 1)
+            if source.is_mock and live_answered:
+                entry.weight = 0.0
+            else:
+                entry.weight = round(source.weight * 0.5 ** (entry.age_seconds / FRESHNESS_HALF_LIFE), 4)
+        sources.append(entry)
+
+    aggregated = []
+    for i in range(limit):
+        total = weight_sum = 0.0
+        timestamps = []
+        for source, data, _, _ in blended:
+            if i >= len(data):
+                continue
+            weight = source.weight * 0.5 ** (_age_seconds(data[i].timestamp, now) / FRESHNESS_HALF_LIFE)
+            total += weight * data[i].value
+            weight_sum += weight
+            timestamps.append(data[i].timestamp)
+        if weight_sum == 0:
+            break
+        value = round(total / weight_sum, 1)
+        aggregated.append(FearGreedData(
+            value=value,
+            value_classification=classify(value),
+            timestamp=max(timestamps)
+        ))
+
+    queried = [entry for entry in sources if entry.status != "unconfigured" and not entry.is_mock]
+    contributing = [entry for entry in queried if entry.status == "ok"]
+    if not contributing:
+        provenance = "mock"
+    elif len(contributing) < len(queried):
+        provenance = "partial"
+    else:
+        provenance = "live"
+    return aggregated, sources, provenance
+
+@timed("process_response")
 async def process_response(ctx: Context, msg: FearGreedRequest) -> FearGreedResponse:
     """Process the request and return formatted response"""
-    fgi_data = get_fear_greed_index(msg.limit)
+    limit = msg.limit or 1
+    names = [name.strip() for name in FEAR_GREED_SOURCES.split(",") if name.strip()]
+    results = await gather_sources(limit, names, FEAR_GREED_DEADLINE)
+    fgi_data, sources, provenance = aggregate(results, limit)
+
+    status = "success"
+    if not fgi_data:
+        # No source answered in time, fall back to mock values and say so
+        ctx.logger.warning("No fear & greed source answered, returning mock data")
+        fgi_data = get_mock_fear_greed_index(limit)
+        provenance = "mock"
+        status = "degraded"
 
+    for entry in sources:
+        ctx.logger.info(f"Source {entry.source}: {entry.status} value={entry.value} "
+                        f"weight={entry.weight} age={entry.age_seconds}s latency={entry.latency_ms}ms")
     for entry in fgi_data:
         ctx.logger.info(f"Fear and Greed Index: {entry.value}")
         ctx.logger.info(f"Classification: {entry.value_classification}")
         ctx.logger.info(f"Timestamp: {entry.timestamp}")
+    ctx.logger.info(f"Provenance: {provenance}")
     
     return FearGreedResponse(
         data=fgi_data,
-        status="success",
-        timestamp=datetime.now().isoformat()
+        status=status,
+        timestamp=datetime.now().isoformat(),
+        provenance=provenance,
+        sources=sources
     )
 
 @agent.on_message(model=FearGreedRequest)
+@timed("handle_fear_greed_request")
 async def handle_fear_greed_request(ctx: Context, sender: str, msg: FearGreedRequest):
     """Handle incoming request for Fear & Greed Index data"""
     ctx.logger.info(f"Received Fear & Greed Index request from {sender} for limit: {msg.limit}")
@@ -95,7 +302,8 @@ async def handle_fear_greed_request(ctx: Context, sender: str, msg: FearGreedReq
     #fgi_data = get_fear_greed_index(msg.limit)
     response = await process_response(ctx, msg)
     
-    await ctx.send(sender, response)
+    with measure("ctx.send"):
+        await ctx.send(sender, response)
 
 @agent.on_event("startup")
 async def startup(ctx: Context):
@@ -104,5 +312,7 @@ async def startup(ctx: Context):
     #dummy_request = FearGreedRequest(limit=1)
     #await process_response(ctx, dummy_request)
 
+instrument(agent)
+
 if __name__ == "__main__":
     agent.run()
\ No newline at end of file
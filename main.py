@@ -1,9 +1,21 @@
+import asyncio
 import os
-from uagents import Agent, Context, Bureau
+from uagents import Agent, Context, Bureau, Protocol
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List
 from datetime import datetime
+from dotenv import load_dotenv
 from asi.llm import query_llm
+from query.index import RecommendationIndex
+from shared.instrumentation import instrument, measure, timed
+from shared.models import (
+    CryptoRecommendation, FearGreedRequest, FearGreedResponse, MarketRequest, MarketResponse,
+    NewsRequest, NewsResponse, RecommendationQuery, RecommendationQueryResponse, RiskRequest, RiskResponse
+)
+from shared.sharding import ShardTracker
+
+# Agent addresses and the LLM API key come from .env
+load_dotenv()
 
 SEED_PHRASE = os.getenv("SEED_PHRASE")
 
@@ -16,76 +28,23 @@ agent = Agent(name="TradeAngel Agent",
 # Define agent addresses for Agentverse hosted agents
 NEWS_AGENT_ADDRESS = os.getenv("NEWS_AGENT_ADDRESS")
 MARKET_DATA_AGENT_ADDRESS = os.getenv("MARKET_DATA_AGENT_ADDRESS")
+# Comma separated market data agent replicas, each owning a shard of COINS
+MARKET_DATA_AGENT_ADDRESSES = [address.strip() for address in
+    os.getenv("MARKET_DATA_AGENT_ADDRESSES", MARKET_DATA_AGENT_ADDRESS or "").split(",") if address.strip()]
 RISK_AGENT_ADDRESS = os.getenv("RISK_AGENT_ADDRESS")
 FEAR_GREED_AGENT_ADDRESS = os.getenv("FEAR_GREED_AGENT_ADDRESS")
 
 # Coins to monitor
 COINS = ["bitcoin", "ethereum", "solana"]
 
-# Data models
-class NewsRequest(BaseModel):
-    limit: Optional[int] = 5
-
-class MarketRequest(BaseModel):
-    coin_ids: List[str]
-
-class FearGreedRequest(BaseModel):
-    limit: Optional[int] = 1
-
-class RiskRequest(BaseModel):
-    risk_tolerance: int = 3  # 1-5 scale (1: very conservative, 5: very aggressive)
-
-class NewsData(BaseModel):
-    source: str
-    title: str
-    summary: str
-    sentiment: float  # -1.0 to 1.0
-    timestamp: str
-
-class NewsResponse(BaseModel):
-    data: List[NewsData]
-    status: str
-    timestamp: str
+# User the generated recommendations are indexed under
+USER_ID = os.getenv("TRADEANGEL_USER_ID", "default")
 
-class MarketData(BaseModel):
-    name: str
-    symbol: str
-    current_price: float
-    market_cap: float
-    total_volume: float
-    price_change_24h: float
+# Seconds before a silent replica's shard is reassigned to the other replicas
+SHARD_TIMEOUT = float(os.getenv("SHARD_TIMEOUT", "30"))
 
-class MarketResponse(BaseModel):
-    data: List[MarketData]
-    status: str
-    timestamp: str
-
-class FearGreedData(BaseModel):
-    value: float
-    value_classification: str
-    timestamp: str
-
-class FearGreedResponse(BaseModel):
-    data: List[FearGreedData]
-    status: str
-    timestamp: str
-
-class RiskAssessment(BaseModel):
-    risk_level: int  # 1-5 scale
-    factors: List[str]
-    timestamp: str
-
-class RiskResponse(BaseModel):
-    data: RiskAssessment
-    status: str
-    timestamp: str
-
-class CryptoRecommendation(BaseModel):
-    coin: str
-    action: str  # BUY, SELL, HOLD
-    confidence: float  # 0.0 to 1.0
-    reasoning: str
-    timestamp: str
+# Optional local HTTP endpoint for recommendation queries (disabled when unset)
+RECOMMENDATION_HTTP_PORT = os.getenv("RECOMMENDATION_HTTP_PORT")
 
 # Global variables to store agent responses
 news_data = None
@@ -97,26 +56,69 @@ user_preferences = {
     "favorite_coins": ["bitcoin", "ethereum", "solana"]
 }
 
+# Market data shard assignments and partial responses for the current round
+market_shards = ShardTracker(MARKET_DATA_AGENT_ADDRESSES, timeout=SHARD_TIMEOUT)
+silent_replicas = set()  # Last reported silent replicas, to log only changes
+
+# Latest and historical recommendations, served without triggering a new cycle
+recommendation_index = RecommendationIndex()
+query_protocol = Protocol(name="TradeAngelRecommendationQuery", version="0.1.0")
+
 # Message handlers and AI integration
 @agent.on_event("startup")
 async def introduce_agent(ctx: Context):
     """Introduces the TradeAngel agent"""
     ctx.logger.info(f"Hello! I'm {agent.name} and my address is {agent.address}.")
     print(f"Hello! I'm {agent.name} and my address is {agent.address}.")
+    if RECOMMENDATION_HTTP_PORT:
+        # Only imported when the endpoint is enabled
+        from query.server import start_http_server
+        start_http_server(recommendation_index, int(RECOMMENDATION_HTTP_PORT), default_user=USER_ID)
+        ctx.logger.info(f"Serving recommendations on http://127.0.0.1:{RECOMMENDATION_HTTP_PORT}/recommendations")
     await request_all_data(ctx)
 
 @agent.on_interval(period=5 * 60.0)  # Runs every 5 min
+@timed("request_all_data")
 async def request_all_data(ctx: Context):
     """Requests data from all agents on a 5 min basis."""
     try:
-        await ctx.send(NEWS_AGENT_ADDRESS, NewsRequest())
-        await ctx.send(MARKET_DATA_AGENT_ADDRESS, MarketRequest(coin_ids=COINS))
-        await ctx.send(FEAR_GREED_AGENT_ADDRESS, FearGreedRequest())
-        await ctx.send(RISK_AGENT_ADDRESS, RiskRequest(risk_tolerance=user_preferences["risk_tolerance"]))
+        outgoing = [
+            (NEWS_AGENT_ADDRESS, NewsRequest()),
+            (FEAR_GREED_AGENT_ADDRESS, FearGreedRequest()),
+            (RISK_AGENT_ADDRESS, RiskRequest(risk_tolerance=user_preferences["risk_tolerance"]))
+        ]
+        for address, coin_ids in market_shards.dispatch(COINS).items():
+            outgoing.append((address, MarketRequest(coin_ids=coin_ids)))
+        await asyncio.gather(*(send_request(ctx, address, request) for address, request in outgoing))
     except Exception as e:
         ctx.logger.error(f"Error requesting data: {e}")
 
+async def send_request(ctx: Context, address: str, request: BaseModel):
+    """Sends a single data request."""
+    with measure("ctx.send"):
+        await ctx.send(address, request)
+
+@agent.on_interval(period=5.0)
+async def rebalance_market_shards(ctx: Context):
+    """Reassigns the coins of market data replicas that went silent."""
+    global silent_replicas
+    reassigned = market_shards.expire()
+    dead = set(market_shards.dead)
+    if dead - silent_replicas:
+        ctx.logger.warning(f"Market data replicas went silent: {list(dead - silent_replicas)}")
+    if silent_replicas - dead:
+        ctx.logger.info(f"Market data replicas restored: {list(silent_replicas - dead)}")
+    silent_replicas = dead
+    if reassigned:
+        ctx.logger.info(f"Reassigning market data shards: {reassigned}")
+        await asyncio.gather(*(send_request(ctx, address, MarketRequest(coin_ids=coin_ids))
+                               for address, coin_ids in reassigned.items()))
+    elif market_shards.parts and market_shards.complete and market_data is None:
+        # The silent replicas' coins could not be reassigned, continue with what arrived
+        await merge_market_shards(ctx)
+
 @agent.on_message(model=NewsResponse)
+@timed("handle_news_response")
 async def handle_news_response(ctx: Context, sender: str, msg: NewsResponse):
     """Handles incoming news data."""
     global news_data
@@ -126,24 +128,42 @@ async def handle_news_response(ctx: Context, sender: str, msg: NewsResponse):
     await generate_recommendation_if_ready(ctx)
 
 @agent.on_message(model=MarketResponse)
+@timed("handle_market_response")
 async def handle_market_response(ctx: Context, sender: str, msg: MarketResponse):
     """Handles incoming market data."""
-    global market_data
-    market_data = msg
     ctx.logger.info(f"Received market data from {sender}")
     ctx.logger.info(f"Received market data:{msg}")
+    if market_shards.receive(sender, msg.data, msg.coin_ids):
+        await merge_market_shards(ctx)
+    else:
+        ctx.logger.info(f"Waiting for market data shards from: {list(market_shards.pending)}")
+
+async def merge_market_shards(ctx: Context):
+    """Merges the market data shards of the current round into one response."""
+    global market_data
+    market_data = MarketResponse(
+        data=list(market_shards.parts),
+        status="success",
+        timestamp=datetime.now().isoformat(),
+        coin_ids=COINS
+    )
+    market_shards.parts = []
     await generate_recommendation_if_ready(ctx)
 
 @agent.on_message(model=FearGreedResponse)
+@timed("handle_fear_greed_response")
 async def handle_fear_greed_response(ctx: Context, sender: str, msg: FearGreedResponse):
     """Handles incoming fear and greed index data."""
     global fear_greed_data
     fear_greed_data = msg
     ctx.logger.info(f"Received fear and greed data from {sender}")
     ctx.logger.info(f"Received fear and greed data:{msg}")
+    if msg.provenance != "live":
+        ctx.logger.warning(f"Fear and greed data provenance is '{msg.provenance}'")
     await generate_recommendation_if_ready(ctx)
 
 @agent.on_message(model=RiskResponse)
+@timed("handle_risk_response")
 async def handle_risk_response(ctx: Context, sender: str, msg: RiskResponse):
     """Handles incoming risk assessment."""
     global risk_assessment
@@ -152,6 +172,37 @@ async def handle_risk_response(ctx: Context, sender: str, msg: RiskResponse):
     ctx.logger.info(f"Received risk assessment:{msg}")
     await generate_recommendation_if_ready(ctx)
 
+@query_protocol.on_message(model=RecommendationQuery, replies=RecommendationQueryResponse)
+@timed("handle_recommendation_query")
+async def handle_recommendation_query(ctx: Context, sender: str, msg: RecommendationQuery):
+    """Answers recommendation queries from the in-memory index."""
+    try:
+        results = recommendation_index.query(
+            coin=msg.coin,
+            user=msg.user or USER_ID,
+            action=msg.action,
+            min_confidence=msg.min_confidence,
+            max_confidence=msg.max_confidence,
+            include_history=msg.include_history,
+            limit=msg.limit
+        )
+        status = "success"
+    except ValueError as e:
+        ctx.logger.warning(f"Invalid recommendation query from {sender}: {e}")
+        results = []
+        status = f"error: {e}"
+    with measure("ctx.send"):
+        await ctx.send(sender, RecommendationQueryResponse(
+            data=results,
+            cycle=recommendation_index.cycle,
+            status=status,
+            timestamp=datetime.now().isoformat()
+        ))
+
+agent.include(query_protocol)
+instrument(agent)
+
+@timed("generate_recommendation_if_ready")
 async def generate_recommendation_if_ready(ctx: Context):
     """Generates investment recommendations if all required data is available."""
     global news_data, market_data, fear_greed_data, risk_assessment
@@ -161,6 +212,9 @@ async def generate_recommendation_if_ready(ctx: Context):
         # Prepare data for analysis
         recommendations = await analyze_with_llm(ctx)
         
+        # Index recommendations so they can be queried until the next cycle
+        recommendation_index.publish(recommendations, user=USER_ID)
+
         # Log recommendations
         for rec in recommendations:
             ctx.logger.info(f"RECOMMENDATION: {rec.coin} - {rec.action} (Confidence: {rec.confidence})")
@@ -177,6 +231,7 @@ async def generate_recommendation_if_ready(ctx: Context):
         ctx.logger.info(f"Current data status: News: {news_data is not None}, Market: {market_data is not None}, "
                         f"Fear & Greed: {fear_greed_data is not None}, Risk: {risk_assessment is not None}")
 
+@timed("analyze_with_llm")
 async def analyze_with_llm(ctx: Context) -> List[CryptoRecommendation]:
     """Uses ASI-1 Mini to analyze data and generate recommendations."""
     recommendations = []
@@ -193,6 +248,8 @@ async def analyze_with_llm(ctx: Context) -> List[CryptoRecommendation]:
     ])
     
     fear_greed_summary = f"Fear & Greed Index: {fear_greed_data.data[0].value} ({fear_greed_data.data[0].value_classification})"
+    if fear_greed_data.provenance == "mock":
+        fear_greed_summary += " [placeholder value, no live source available: ignore it]"
     
     risk_summary = f"Risk Assessment: Level {risk_assessment.data.risk_level}/5\nFactors: {', '.join(risk_assessment.data.factors)}"
     
@@ -227,7 +284,8 @@ async def analyze_with_llm(ctx: Context) -> List[CryptoRecommendation]:
     """
     
     # Query ASI-1 Mini
-    response = query_llm(prompt)
+    with measure("query_llm"):
+        response = query_llm(prompt)
     
     # Parse the response to extract recommendations
     current_coin = None
@@ -1,28 +1,26 @@
+import os
+import sys
+
+# Make the shared modules importable when running `python <agent>/agent.py`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 from uagents import Agent, Context
-from pydantic import BaseModel
-from typing import List, Optional
+from typing import List
 import requests
 from datetime import datetime
+from shared.instrumentation import instrument, measure, timed
+from shared.models import MarketRequest, MarketData, MarketResponse
 
-agent = Agent(name="Crypto Market Data Agent")
-
-# Models
-class MarketRequest(BaseModel):
-    coin_ids: List[str]
+# Replicas sharing the coin universe are told apart by their seed, and need
+# their own port when several of them run on one host
+agent_options = {"seed": os.getenv("MARKET_DATA_AGENT_SEED")}
+if os.getenv("MARKET_DATA_AGENT_PORT"):
+    port = int(os.getenv("MARKET_DATA_AGENT_PORT"))
+    agent_options.update(port=port, endpoint=[f"http://127.0.0.1:{port}/submit"])
 
-class MarketData(BaseModel):
-    name: str
-    symbol: str
-    current_price: float
-    market_cap: float
-    total_volume: float
-    price_change_24h: float
-
-class MarketResponse(BaseModel):
-    data: List[MarketData]
-    status: str
-    timestamp: str
+agent = Agent(name="Crypto Market Data Agent", **agent_options)
 
+@timed("get_market_data")
 def get_market_data(coin_ids: List[str]) -> List[MarketData]:
     """Fetch cryptocurrency market data from CoinGecko API"""
     coins_str = ",".join(coin_ids)
@@ -91,6 +89,7 @@ def get_mock_market_data(coin_ids: List[str]) -> List[MarketData]:
                 price_change_24h=0.0
             )) for coin_id in coin_ids]
 
+@timed("process_response")
 async def process_response(ctx: Context, msg: MarketRequest) -> MarketResponse:
     """Process the crypto request and return formatted response"""
     market_data = get_market_data(msg.coin_ids)
@@ -98,10 +97,12 @@ async def process_response(ctx: Context, msg: MarketRequest) -> MarketResponse:
     return MarketResponse(
         data=market_data,
         status="success",
-        timestamp=datetime.now().isoformat()
+        timestamp=datetime.now().isoformat(),
+        coin_ids=msg.coin_ids
     )
 
 @agent.on_message(model=MarketRequest)
+@timed("handle_market_request")
 async def handle_market_request(ctx: Context, sender: str, msg: MarketRequest):
     """Handle incoming request for market data"""
     ctx.logger.info(f"Received market data request from {sender} for coins: {msg.coin_ids}")
@@ -109,7 +110,8 @@ async def handle_market_request(ctx: Context, sender: str, msg: MarketRequest):
     #market_data = get_market_data(msg.coin_ids)
     response = await process_response(ctx, msg)
     
-    await ctx.send(sender, response)
+    with measure("ctx.send"):
+        await ctx.send(sender, response)
 
 @agent.on_event("startup")
 async def startup(ctx: Context):
@@ -118,5 +120,7 @@ async def startup(ctx: Context):
     #dummy_request = MarketRequest(coin_ids=["bitcoin","ethereum", "solana"])
     #await process_response(ctx, dummy_request)
 
+instrument(agent)
+
 if __name__ == "__main__":
     agent.run()
\ No newline at end of file
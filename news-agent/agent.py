@@ -1,28 +1,19 @@
 import os
+import sys
+
+# Make the shared modules importable when running `python <agent>/agent.py`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 from uagents import Agent, Context
-from pydantic import BaseModel
-from typing import List, Optional
+from typing import List
 import requests
 from datetime import datetime
+from shared.instrumentation import instrument, measure, timed
+from shared.models import NewsRequest, NewsData, NewsResponse
 
 agent = Agent(name="Crypto News Agent")
 
-# Models
-class NewsRequest(BaseModel):
-    limit: Optional[int] = 5
-
-class NewsData(BaseModel):
-    source: str
-    title: str
-    summary: str
-    sentiment: float  # -1.0 to 1.0
-    timestamp: str
-
-class NewsResponse(BaseModel):
-    data: List[NewsData]
-    status: str
-    timestamp: str
-
+@timed("get_crypto_news")
 def get_crypto_news(limit: int = 5) -> List[NewsData]:
     """Fetch cryptocurrency news from CryptoPanic API"""
     # Get an API key at https://cryptopanic.com/developers/api/
@@ -97,6 +88,7 @@ def get_mock_news(limit: int = 5) -> List[NewsData]:
     ]
     return mock_news[:limit]
 
+@timed("process_response")
 async def process_response(ctx: Context, msg: NewsRequest) -> NewsResponse:
     """Process the request and return formatted response"""
     news_items = get_crypto_news(msg.limit)
@@ -113,6 +105,7 @@ async def process_response(ctx: Context, msg: NewsRequest) -> NewsResponse:
     )
 
 @agent.on_message(model=NewsRequest)
+@timed("handle_news_request")
 async def handle_news_request(ctx: Context, sender: str, msg: NewsRequest):
     """Handle incoming request for crypto news"""
     ctx.logger.info(f"Received news request from {sender} for {msg.limit} news items")
@@ -120,7 +113,8 @@ async def handle_news_request(ctx: Context, sender: str, msg: NewsRequest):
     #news_items = get_crypto_news(msg.limit)
     response = await process_response(ctx, msg)
     
-    await ctx.send(sender, response)
+    with measure("ctx.send"):
+        await ctx.send(sender, response)
 
 @agent.on_event("startup")
 async def startup(ctx: Context):
@@ -129,5 +123,7 @@ async def startup(ctx: Context):
     #dummy_request = NewsRequest(limit=5)
     #await process_response(ctx, dummy_request)
 
+instrument(agent)
+
 if __name__ == "__main__":
     agent.run()
\ No newline at end of file
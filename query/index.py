@@ -0,0 +1,104 @@
+import heapq
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_USER = "default"
+
+class RecommendationIndex:
+    """In-memory index of CryptoRecommendations keyed by user and coin.
+
+    Every published cycle rebuilds an immutable snapshot (latest per coin,
+    latest grouped by action and sorted by confidence, and per-coin history)
+    and swaps it in with a single assignment, so queries never take a lock
+    and never wait on the data agents or the LLM.
+    """
+
+    def __init__(self, history_limit: int = 50):
+        self.history_limit = history_limit
+        self._write_lock = threading.Lock()
+        self._history: Dict[Tuple[str, str], deque] = {}  # (user, coin) -> (sequence, rec), newest first
+        self._sequence = 0  # Publish order of every stored recommendation
+        self._snapshot = _Snapshot({}, {}, {}, 0)
+
+    @property
+    def cycle(self) -> int:
+        """Number of recommendation cycles published so far"""
+        return self._snapshot.cycle
+
+    def publish(self, recommendations: Iterable, user: str = DEFAULT_USER) -> int:
+        """Stores a new cycle of recommendations for a user and returns the cycle number"""
+        with self._write_lock:
+            current = self._snapshot
+            latest = dict(current.latest)
+            by_action = dict(current.by_action)
+            history = dict(current.history)
+
+            user_latest = dict(latest.get(user, {}))
+            for rec in recommendations:
+                coin = rec.coin.lower()
+                user_latest[coin] = rec
+                entries = self._history.setdefault((user, coin), deque(maxlen=self.history_limit))
+                self._sequence += 1
+                entries.appendleft((self._sequence, rec))
+                history[(user, coin)] = tuple(entries)
+
+            actions: Dict[str, List] = {}
+            for rec in user_latest.values():
+                actions.setdefault(rec.action.upper(), []).append(rec)
+            latest[user] = user_latest
+            by_action[user] = {
+                action: tuple(sorted(recs, key=lambda r: r.confidence, reverse=True))
+                for action, recs in actions.items()
+            }
+
+            self._snapshot = _Snapshot(latest, by_action, history, current.cycle + 1)
+            return current.cycle + 1
+
+    def query(self, coin: Optional[str] = None, user: str = DEFAULT_USER,
+              action: Optional[str] = None, min_confidence: Optional[float] = None,
+              max_confidence: Optional[float] = None, include_history: bool = False,
+              limit: Optional[int] = None) -> List:
+        """Returns the latest (or historical) recommendations matching the filters"""
+        if limit is not None and limit < 1:
+            raise ValueError("limit must be at least 1")
+        snapshot = self._snapshot
+
+        if include_history:
+            if coin is not None:
+                entries = snapshot.history.get((user, coin.lower()), ())
+            else:
+                # Each coin's history is newest first, merge them by publish order
+                entries = heapq.merge(*(entries for (owner, _), entries in snapshot.history.items()
+                                        if owner == user), key=lambda entry: entry[0], reverse=True)
+            candidates = (rec for _, rec in entries)
+        elif coin is not None:
+            rec = snapshot.latest.get(user, {}).get(coin.lower())
+            candidates = (rec,) if rec is not None else ()
+        elif action is not None:
+            # Already grouped by action and sorted by confidence
+            candidates = snapshot.by_action.get(user, {}).get(action.upper(), ())
+        else:
+            candidates = snapshot.latest.get(user, {}).values()
+
+        results = []
+        for rec in candidates:
+            if action is not None and rec.action.upper() != action.upper():
+                continue
+            if min_confidence is not None and rec.confidence < min_confidence:
+                continue
+            if max_confidence is not None and rec.confidence > max_confidence:
+                continue
+            results.append(rec)
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+class _Snapshot:
+    __slots__ = ("latest", "by_action", "history", "cycle")
+
+    def __init__(self, latest, by_action, history, cycle):
+        self.latest = latest
+        self.by_action = by_action
+        self.history = history
+        self.cycle = cycle
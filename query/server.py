@@ -0,0 +1,67 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from query.index import DEFAULT_USER, RecommendationIndex
+
+def _to_dict(rec) -> dict:
+    """Serializes a recommendation model (pydantic v1 or v2) to a dict"""
+    if hasattr(rec, "model_dump"):
+        return rec.model_dump()
+    if hasattr(rec, "dict"):
+        return rec.dict()
+    return dict(vars(rec))
+
+def _make_handler(index: RecommendationIndex, default_user: str):
+    class RecommendationHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/recommendations":
+                self._reply(404, {"status": "error", "error": "not found"})
+                return
+
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            try:
+                results = index.query(
+                    coin=params.get("coin"),
+                    user=params.get("user", default_user),
+                    action=params.get("action"),
+                    min_confidence=float(params["min_confidence"]) if "min_confidence" in params else None,
+                    max_confidence=float(params["max_confidence"]) if "max_confidence" in params else None,
+                    include_history=params.get("history", "false").lower() in ("1", "true", "yes"),
+                    limit=int(params["limit"]) if "limit" in params else None,
+                )
+            except ValueError as e:
+                self._reply(400, {"status": "error", "error": str(e)})
+                return
+
+            self._reply(200, {
+                "status": "success",
+                "cycle": index.cycle,
+                "data": [_to_dict(rec) for rec in results],
+            })
+
+        def _reply(self, code: int, body: dict):
+            payload = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            # Keep the agent's console output readable
+            pass
+
+    return RecommendationHandler
+
+def start_http_server(index: RecommendationIndex, port: int, host: str = "127.0.0.1",
+                      default_user: str = DEFAULT_USER) -> ThreadingHTTPServer:
+    """Serves GET /recommendations from the index on a background thread.
+
+    Queries without a user parameter read default_user's recommendations."""
+    server = ThreadingHTTPServer((host, port), _make_handler(index, default_user))
+    thread = threading.Thread(target=server.serve_forever, name="recommendation-http", daemon=True)
+    thread.start()
+    return server
@@ -1,24 +1,18 @@
+import os
+import sys
+
+# Make the shared modules importable when running `python <agent>/agent.py`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 from uagents import Agent, Context
-from pydantic import BaseModel
 from typing import List
 from datetime import datetime
+from shared.instrumentation import instrument, measure, timed
+from shared.models import RiskRequest, RiskAssessment, RiskResponse
 
 agent = Agent(name="Crypto Risk Assessment Agent")
 
-# Models
-class RiskRequest(BaseModel):
-    risk_tolerance: int = 3  # 1-5 scale (1: very conservative, 5: very aggressive)
-
-class RiskAssessment(BaseModel):
-    risk_level: int  # 1-5 scale
-    factors: List[str]
-    timestamp: str
-
-class RiskResponse(BaseModel):
-    data: RiskAssessment
-    status: str
-    timestamp: str
-
+@timed("assess_risk")
 def assess_risk(risk_tolerance: int) -> RiskAssessment:
     """Generate a risk assessment based on user risk tolerance and market conditions"""
     # This would typically use real market data, fear greed index, etc.
@@ -58,6 +52,7 @@ def assess_risk(risk_tolerance: int) -> RiskAssessment:
         timestamp=datetime.now().isoformat()
     )
 
+@timed("process_response")
 async def process_response(ctx: Context, msg: RiskRequest) -> RiskResponse:
     """Process the request and return formatted response"""
     risk_assessment = assess_risk(msg.risk_tolerance)
@@ -73,6 +68,7 @@ async def process_response(ctx: Context, msg: RiskRequest) -> RiskResponse:
     )
 
 @agent.on_message(model=RiskRequest)
+@timed("handle_risk_request")
 async def handle_risk_request(ctx: Context, sender: str, msg: RiskRequest):
     """Handle incoming request for risk assessment"""
     ctx.logger.info(f"Received risk assessment request from {sender} with risk tolerance: {msg.risk_tolerance}")
@@ -80,7 +76,8 @@ async def handle_risk_request(ctx: Context, sender: str, msg: RiskRequest):
     #risk_assessment = assess_risk(msg.risk_tolerance)
     response = await process_response(ctx, msg)
     
-    await ctx.send(sender, response)
+    with measure("ctx.send"):
+        await ctx.send(sender, response)
 
 @agent.on_event("startup")
 async def startup(ctx: Context):
@@ -89,5 +86,7 @@ async def startup(ctx: Context):
     #dummy_request = RiskRequest(risk_tolerance=5)
     #await process_response(ctx, dummy_request)
 
+instrument(agent)
+
 if __name__ == "__main__":
     agent.run()
\ No newline at end of file
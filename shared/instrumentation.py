@@ -0,0 +1,314 @@
+import asyncio
+import functools
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional
+
+from uagents import Context, Protocol
+
+from shared.models import ProfileRequest, ProfileResponse
+
+# Instrumentation is opt-in, when disabled the decorators return the handler untouched.
+# The profilers and http.server are imported on first use to keep agent startup cheap.
+METRICS_ENABLED = os.getenv("TRADEANGEL_METRICS", "").lower() in ("1", "true", "yes")
+# Port for the scrapeable /metrics endpoint (disabled when unset)
+METRICS_PORT = os.getenv("METRICS_PORT")
+# Seconds between metric summaries written to the agent log
+METRICS_SUMMARY_PERIOD = float(os.getenv("METRICS_SUMMARY_PERIOD", "60"))
+# Seconds between event loop lag samples
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.5"))
+# Comma separated agent addresses allowed to request profiles (none when unset)
+PROFILE_ALLOWED_SENDERS = {address.strip() for address in
+    os.getenv("PROFILE_ALLOWED_SENDERS", "").split(",") if address.strip()}
+# Upper limits for a requested profile snapshot
+PROFILE_MAX_DURATION = float(os.getenv("PROFILE_MAX_DURATION", "30"))
+PROFILE_MAX_TOP = 100
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+class Timing:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th quantile"""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timings: Dict[str, Timing] = {}
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            timing = self._timings.get(name)
+            if timing is None:
+                timing = self._timings[name] = Timing()
+            timing.observe(seconds)
+
+    def snapshot(self) -> Dict[str, Timing]:
+        with self._lock:
+            copies = {}
+            for name, timing in self._timings.items():
+                copy = Timing()
+                copy.count, copy.total, copy.max = timing.count, timing.total, timing.max
+                copy.buckets = list(timing.buckets)
+                copies[name] = copy
+            return copies
+
+    def summary(self) -> str:
+        lines = []
+        for name, timing in sorted(self.snapshot().items()):
+            lines.append(f"{name}: count={timing.count} avg={timing.total / timing.count * 1000:.1f}ms "
+                         f"p50<={timing.quantile(0.5) * 1000:.1f}ms p99<={timing.quantile(0.99) * 1000:.1f}ms "
+                         f"max={timing.max * 1000:.1f}ms")
+        return "\n".join(lines)
+
+    def prometheus(self) -> str:
+        """Renders all timings in the Prometheus text exposition format"""
+        lines = ["# TYPE tradeangel_duration_seconds histogram"]
+        for name, timing in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS, timing.buckets):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'tradeangel_duration_seconds_bucket{{name="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'tradeangel_duration_seconds_sum{{name="{name}"}} {timing.total}')
+            lines.append(f'tradeangel_duration_seconds_count{{name="{name}"}} {timing.count}')
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+def timed(name: Optional[str] = None):
+    """Records the duration of every call of a sync or async function"""
+    def decorator(fn):
+        if not METRICS_ENABLED:
+            return fn
+        metric = name or fn.__name__
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    metrics.observe(metric, time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.observe(metric, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+class measure:
+    """Records the duration of a block, e.g. an awaited ctx.send"""
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        if METRICS_ENABLED:
+            metrics.observe(self.name, time.perf_counter() - self.start)
+
+async def monitor_loop_lag(interval: float = LOOP_LAG_INTERVAL):
+    """Samples how late the event loop wakes up, i.e. how long it was blocked"""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        metrics.observe("event_loop_lag", max(0.0, loop.time() - start - interval))
+
+_profile_running = False
+
+async def profile_snapshot(mode: str = "cprofile", duration: float = 5.0, top: int = 25) -> str:
+    """Profiles the event loop thread for duration seconds and returns a text report.
+
+    cprofile traces every call made on the loop thread. sample takes stack
+    samples of the loop thread from a helper thread every 10ms, which is
+    cheaper and also catches time spent inside blocking C calls. duration and
+    top are capped, and only one snapshot runs at a time (RuntimeError otherwise)."""
+    global _profile_running
+    if _profile_running:
+        raise RuntimeError("a profile snapshot is already running")
+    _profile_running = True
+    try:
+        return await _profile(mode, max(0.0, min(duration, PROFILE_MAX_DURATION)),
+                              max(1, min(top, PROFILE_MAX_TOP)))
+    finally:
+        _profile_running = False
+
+async def _profile(mode: str, duration: float, top: int) -> str:
+    if mode == "sample":
+        loop_thread = threading.get_ident()
+        samples = Counter()
+        done = threading.Event()
+
+        def sampler():
+            while not done.wait(0.01):
+                frame = sys._current_frames().get(loop_thread)
+                if frame is not None:
+                    stack = traceback.extract_stack(frame)
+                    samples[";".join(f"{f.name} ({os.path.basename(f.filename)}:{f.lineno})" for f in stack)] += 1
+
+        thread = threading.Thread(target=sampler, name="profile-sampler", daemon=True)
+        thread.start()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            done.set()
+            thread.join()
+        total = sum(samples.values()) or 1
+        return "\n".join(f"{count / total:6.1%} {stack}" for stack, count in samples.most_common(top))
+
+    import cProfile
+    import io
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        await asyncio.sleep(duration)
+    finally:
+        profiler.disable()
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(top)
+    return output.getvalue()
+
+def _make_metrics_handler():
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_response(404)
+                self.end_headers()
+                return
+            payload = metrics.prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            # Keep the agent's console output readable
+            pass
+
+    return MetricsHandler
+
+def start_metrics_server(port: int, host: str = "127.0.0.1"):
+    """Serves GET /metrics on a background thread and returns the server"""
+    from http.server import ThreadingHTTPServer
+
+    server = ThreadingHTTPServer((host, port), _make_metrics_handler())
+    thread = threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True)
+    thread.start()
+    return server
+
+def instrument(agent):
+    """Adds loop lag sampling, periodic summaries, the /metrics endpoint and
+    profiling snapshots (SIGUSR1, or ProfileRequest messages from the
+    PROFILE_ALLOWED_SENDERS addresses) to an agent.
+
+    Does nothing unless TRADEANGEL_METRICS is set."""
+    if not METRICS_ENABLED:
+        return
+
+    # The loop only keeps weak references to tasks, so hold them until they finish
+    background_tasks = set()
+
+    def run_in_background(coro):
+        task = asyncio.ensure_future(coro)
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+
+    @agent.on_event("startup")
+    async def start_instrumentation(ctx: Context):
+        run_in_background(monitor_loop_lag())
+        if METRICS_PORT:
+            start_metrics_server(int(METRICS_PORT))
+            ctx.logger.info(f"Serving metrics on http://127.0.0.1:{METRICS_PORT}/metrics")
+
+        async def log_profile():
+            try:
+                ctx.logger.info(f"Profile snapshot:\n{await profile_snapshot()}")
+            except RuntimeError as e:
+                ctx.logger.warning(f"Profile snapshot skipped: {e}")
+
+        try:
+            asyncio.get_running_loop().add_signal_handler(
+                signal.SIGUSR1, lambda: run_in_background(log_profile()))
+        except (AttributeError, NotImplementedError, RuntimeError):
+            # No SIGUSR1 or signal handlers on this platform/thread, use ProfileRequest instead
+            pass
+
+    @agent.on_interval(period=METRICS_SUMMARY_PERIOD)
+    async def log_metrics_summary(ctx: Context):
+        summary = metrics.summary()
+        if summary:
+            ctx.logger.info(f"Metrics summary:\n{summary}")
+
+    profile_protocol = Protocol(name="TradeAngelProfiling", version="0.1.0")
+
+    @profile_protocol.on_message(model=ProfileRequest, replies=ProfileResponse)
+    async def handle_profile_request(ctx: Context, sender: str, msg: ProfileRequest):
+        if sender not in PROFILE_ALLOWED_SENDERS:
+            ctx.logger.warning(f"Refused profile request from {sender}")
+            await reply(ctx, sender, "", "forbidden")
+            return
+        if _profile_running:
+            await reply(ctx, sender, "", "busy")
+            return
+        # Profile in the background so the agent keeps handling messages meanwhile
+        run_in_background(run_profile_request(ctx, sender, msg))
+
+    async def run_profile_request(ctx: Context, sender: str, msg: ProfileRequest):
+        try:
+            await reply(ctx, sender, await profile_snapshot(msg.mode, msg.duration, msg.top), "success")
+        except RuntimeError:
+            await reply(ctx, sender, "", "busy")
+
+    async def reply(ctx: Context, sender: str, stats: str, status: str):
+        await ctx.send(sender, ProfileResponse(
+            stats=stats,
+            status=status,
+            timestamp=datetime.now().isoformat()
+        ))
+
+    agent.include(profile_protocol)
@@ -0,0 +1,129 @@
+import copy
+from pydantic import BaseModel, ConfigDict
+from typing import Any, Dict, List, Optional
+
+# Message models shared by TradeAngel and the data agents, defined once so
+# both sides always agree on the schema
+
+_json_schemas: Dict[tuple, Dict[str, Any]] = {}
+
+class SharedModel(BaseModel):
+    # Every agent imports all of these but uses only a few, so each schema is
+    # built on first use rather than at import
+    model_config = ConfigDict(defer_build=True)
+
+    @classmethod
+    def model_json_schema(cls, *args, **kwargs) -> Dict[str, Any]:
+        """Caches the JSON schema, which uAgents hashes into the model digest
+        several times during startup (handler registration, protocol manifests)"""
+        key = (cls, args, tuple(sorted(kwargs.items())))
+        if key not in _json_schemas:
+            _json_schemas[key] = super().model_json_schema(*args, **kwargs)
+        return copy.deepcopy(_json_schemas[key])
+
+# News agent
+class NewsRequest(SharedModel):
+    limit: Optional[int] = 5
+
+class NewsData(SharedModel):
+    source: str
+    title: str
+    summary: str
+    sentiment: float  # -1.0 to 1.0
+    timestamp: str
+
+class NewsResponse(SharedModel):
+    data: List[NewsData]
+    status: str
+    timestamp: str
+
+# Market data agent
+class MarketRequest(SharedModel):
+    coin_ids: List[str]
+
+class MarketData(SharedModel):
+    name: str
+    symbol: str
+    current_price: float
+    market_cap: float
+    total_volume: float
+    price_change_24h: float
+
+class MarketResponse(SharedModel):
+    data: List[MarketData]
+    status: str
+    timestamp: str
+    coin_ids: List[str]  # The requested coins, lets sharded callers match the reply
+
+# Fear & greed agent
+class FearGreedRequest(SharedModel):
+    limit: Optional[int] = 1 # Limit the number of returned results
+
+class FearGreedData(SharedModel):
+    value: float
+    value_classification: str
+    timestamp: str
+
+class FearGreedSourceData(SharedModel):
+    source: str
+    status: str  # ok, error, timeout, unconfigured (missing API key)
+    value: Optional[float] = None
+    weight: float = 0.0  # Effective weight after freshness decay
+    age_seconds: Optional[float] = None
+    latency_ms: Optional[float] = None
+    is_mock: bool = False
+
+class FearGreedResponse(SharedModel):
+    data: List[FearGreedData]
+    status: str
+    timestamp: str
+    provenance: str = "live"  # live, partial (some sources missing), mock
+    sources: List[FearGreedSourceData] = []
+
+# Risk agent
+class RiskRequest(SharedModel):
+    risk_tolerance: int = 3  # 1-5 scale (1: very conservative, 5: very aggressive)
+
+class RiskAssessment(SharedModel):
+    risk_level: int  # 1-5 scale
+    factors: List[str]
+    timestamp: str
+
+class RiskResponse(SharedModel):
+    data: RiskAssessment
+    status: str
+    timestamp: str
+
+# TradeAngel recommendations
+class CryptoRecommendation(SharedModel):
+    coin: str
+    action: str  # BUY, SELL, HOLD
+    confidence: float  # 0.0 to 1.0
+    reasoning: str
+    timestamp: str
+
+class RecommendationQuery(SharedModel):
+    coin: Optional[str] = None
+    user: Optional[str] = None
+    action: Optional[str] = None  # BUY, SELL, HOLD
+    min_confidence: Optional[float] = None
+    max_confidence: Optional[float] = None
+    include_history: bool = False
+    limit: Optional[int] = None
+
+class RecommendationQueryResponse(SharedModel):
+    data: List[CryptoRecommendation]
+    cycle: int
+    status: str
+    timestamp: str
+
+# Profiling (shared/instrumentation.py)
+class ProfileRequest(SharedModel):
+    mode: str = "cprofile"  # cprofile or sample
+    duration: float = 5.0  # Seconds to profile for
+    top: int = 25  # Number of functions/stacks to report
+
+class ProfileResponse(SharedModel):
+    stats: str
+    status: str
+    timestamp: str
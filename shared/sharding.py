@@ -0,0 +1,131 @@
+import hashlib
+import time
+from bisect import bisect
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+class HashRing:
+    """Consistent hash ring mapping keys (coin ids) to replicas (agent addresses).
+
+    Each replica is placed on the ring vnodes times, so removing a replica only
+    moves the keys it owned and spreads them evenly over the others."""
+
+    def __init__(self, replicas: Iterable[str] = (), vnodes: int = 64):
+        self.vnodes = vnodes
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        self.replicas = set()
+        for replica in replicas:
+            self.add(replica)
+
+    def add(self, replica: str):
+        if replica in self.replicas:
+            return
+        self.replicas.add(replica)
+        points = sorted(list(zip(self._points, self._owners)) +
+                        [(_hash(f"{replica}#{i}"), replica) for i in range(self.vnodes)])
+        self._points = [point for point, _ in points]
+        self._owners = [owner for _, owner in points]
+
+    def remove(self, replica: str):
+        if replica not in self.replicas:
+            return
+        self.replicas.discard(replica)
+        points = [(point, owner) for point, owner in zip(self._points, self._owners) if owner != replica]
+        self._points = [point for point, _ in points]
+        self._owners = [owner for _, owner in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._points:
+            return None
+        return self._owners[bisect(self._points, _hash(key)) % len(self._points)]
+
+    def split(self, keys: Iterable[str]) -> Dict[str, List[str]]:
+        """Groups keys by the replica owning them"""
+        shards: Dict[str, List[str]] = {}
+        for key in keys:
+            owner = self.owner(key)
+            if owner is not None:
+                shards.setdefault(owner, []).append(key)
+        return shards
+
+class ShardTracker:
+    """Tracks one round of sharded requests: the keys of every outstanding
+    request per replica, the partial results received so far, and replicas
+    that went silent.
+
+    A replica that does not answer a request within timeout seconds is taken
+    off the ring and the keys of all its outstanding requests are sent as new
+    requests to the remaining replicas. It is put back on the ring
+    retry_after seconds later, or as soon as it answers."""
+
+    def __init__(self, replicas: Iterable[str], timeout: float = 30.0,
+                 retry_after: float = 300.0, vnodes: int = 64):
+        self.ring = HashRing(replicas, vnodes)
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.dead: Dict[str, float] = {}  # replica -> time it was taken off the ring
+        self.pending: Dict[str, List[Tuple[FrozenSet[str], float]]] = {}  # replica -> [(keys, sent at)]
+        self.parts: List = []
+
+    def dispatch(self, keys: Iterable[str], now: Optional[float] = None) -> Dict[str, List[str]]:
+        """Starts a new round and returns the keys to request from each replica"""
+        now = time.monotonic() if now is None else now
+        for replica, since in list(self.dead.items()):
+            # With every replica silent, retrying them beats not asking at all
+            if now - since >= self.retry_after or not self.ring.replicas:
+                del self.dead[replica]
+                self.ring.add(replica)
+
+        shards = self.ring.split(keys)
+        self.pending = {replica: [(frozenset(shard), now)] for replica, shard in shards.items()}
+        self.parts = []
+        return shards
+
+    def receive(self, replica: str, items: Iterable, keys: Iterable[str]) -> bool:
+        """Stores a replica's response to the request for keys. Returns True
+        once this response completes the round, False for replies nobody was
+        waiting for."""
+        if replica in self.dead:
+            # A silent replica answered after all, put it back on the ring
+            del self.dead[replica]
+            self.ring.add(replica)
+
+        requests = self.pending.get(replica)
+        if not requests:
+            return False
+        keys = frozenset(keys)
+        index = next((i for i, (requested, _) in enumerate(requests) if requested == keys), None)
+        if index is None:
+            return False
+
+        del requests[index]
+        if not requests:
+            del self.pending[replica]
+        self.parts.extend(items)
+        return not self.pending
+
+    def expire(self, now: Optional[float] = None) -> Dict[str, List[str]]:
+        """Takes silent replicas off the ring and returns the keys of their
+        outstanding requests reassigned to the remaining replicas"""
+        now = time.monotonic() if now is None else now
+        orphaned = []
+        for replica, requests in list(self.pending.items()):
+            if any(now - sent_at >= self.timeout for _, sent_at in requests):
+                del self.pending[replica]
+                self.ring.remove(replica)
+                self.dead[replica] = now
+                for keys, _ in requests:
+                    orphaned.extend(sorted(keys))
+
+        shards = self.ring.split(orphaned)
+        for replica, keys in shards.items():
+            # A separate request, the replica's earlier ones keep their own deadline
+            self.pending.setdefault(replica, []).append((frozenset(keys), now))
+        return shards
+
+    @property
+    def complete(self) -> bool:
+        return not self.pending
@@ -0,0 +1,107 @@
+import asyncio
+import importlib.util
+import os
+import time
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("uagents")
+
+AGENT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fear-greed-agent", "agent.py")
+DEADLINE = 1.0
+
+def load_agent():
+    spec = importlib.util.spec_from_file_location("fear_greed_agent", AGENT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+fear_greed = load_agent()
+
+@fear_greed.register_source("test-live", weight=1.0)
+def get_live_fear_greed_index(limit: int = 1):
+    """Offline stand-in for a live provider"""
+    return [fear_greed.FearGreedData(value=20, value_classification="Extreme Fear",
+                                     timestamp=datetime.now().isoformat())]
+
+@pytest.fixture(autouse=True)
+def stub_environment(monkeypatch):
+    # The slow stub outlives the deadline but not the test run
+    monkeypatch.setenv("FEAR_GREED_STUB_DELAY", str(DEADLINE * 1.5))
+    monkeypatch.delenv("CMC_API_KEY", raising=False)
+
+def gather(names):
+    """Runs the gather and returns its results with the time it took"""
+    async def run():
+        start = time.perf_counter()
+        results = await fear_greed.gather_sources(1, names, DEADLINE)
+        return results, time.perf_counter() - start
+    return asyncio.run(run())
+
+def statuses(results):
+    return {source.name: status for source, _, _, status in results}
+
+def test_gather_returns_at_the_deadline():
+    results, elapsed = gather(["stub", "stub-slow"])
+    assert DEADLINE <= elapsed < DEADLINE + 0.3
+    assert statuses(results) == {"stub": "ok", "stub-slow": "timeout"}
+
+def test_each_source_reports_its_status():
+    results, _ = gather(["test-live", "stub-slow", "stub-error", "coinmarketcap"])
+    assert statuses(results) == {
+        "test-live": "ok",
+        "stub-slow": "timeout",
+        "stub-error": "error",
+        "coinmarketcap": "unconfigured",
+    }
+
+def test_unknown_source_is_skipped():
+    results, _ = gather(["stub", "no-such-source"])
+    assert statuses(results) == {"stub": "ok"}
+
+def test_all_live_sources_answering_is_live():
+    results, _ = gather(["test-live", "coinmarketcap"])
+    data, _, provenance = fear_greed.aggregate(results, 1)
+    assert provenance == "live"
+    assert data[0].value == 20
+
+def test_failed_live_source_is_partial(monkeypatch):
+    failing_live = fear_greed.FearGreedSource("test-failing-live", fear_greed.get_failing_fear_greed_index,
+                                              1.0, False, None)
+    monkeypatch.setitem(fear_greed.SOURCES, "test-failing-live", failing_live)
+    results, _ = gather(["test-live", "test-failing-live"])
+    assert statuses(results) == {"test-live": "ok", "test-failing-live": "error"}
+    data, _, provenance = fear_greed.aggregate(results, 1)
+    assert provenance == "partial"
+    assert data[0].value == 20
+
+def test_live_source_missing_the_deadline_is_partial(monkeypatch):
+    slow_live = fear_greed.FearGreedSource("test-slow-live", fear_greed.get_slow_mock_fear_greed_index,
+                                           1.0, False, None)
+    monkeypatch.setitem(fear_greed.SOURCES, "test-slow-live", slow_live)
+    results, _ = gather(["test-live", "test-slow-live"])
+    assert statuses(results) == {"test-live": "ok", "test-slow-live": "timeout"}
+    data, _, provenance = fear_greed.aggregate(results, 1)
+    assert provenance == "partial"
+    assert data[0].value == 20
+
+def test_mock_readings_are_left_out_when_a_live_source_answered():
+    results, _ = gather(["test-live", "stub", "stub-error"])
+    data, sources, provenance = fear_greed.aggregate(results, 1)
+    assert provenance == "live"
+    assert data[0].value == 20
+    weights = {entry.source: entry.weight for entry in sources}
+    assert weights["stub"] == 0.0
+
+def test_only_mock_sources_is_mock():
+    results, _ = gather(["stub", "stub-slow", "coinmarketcap"])
+    data, _, provenance = fear_greed.aggregate(results, 1)
+    assert provenance == "mock"
+    assert data[0].value == 50
+
+def test_no_source_answering_is_mock_without_data():
+    results, _ = gather(["stub-error", "stub-slow"])
+    data, _, provenance = fear_greed.aggregate(results, 1)
+    assert provenance == "mock"
+    assert data == []
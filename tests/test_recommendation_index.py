@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+import pytest
+
+from query.index import RecommendationIndex
+
+def rec(coin, action="HOLD", confidence=0.5):
+    """Stands in for main.CryptoRecommendation, the index only reads attributes"""
+    return SimpleNamespace(coin=coin, action=action, confidence=confidence, reasoning="", timestamp="")
+
+@pytest.fixture
+def index():
+    index = RecommendationIndex()
+    index.publish([rec("Bitcoin", "BUY", 0.6), rec("ethereum", "SELL", 0.4), rec("solana", "BUY", 0.9)])
+    index.publish([rec("bitcoin", "HOLD", 0.7)])
+    return index
+
+def test_latest_per_coin(index):
+    assert index.cycle == 2
+    assert [r.action for r in index.query(coin="BITCOIN")] == ["HOLD"]
+    assert {r.coin.lower() for r in index.query()} == {"bitcoin", "ethereum", "solana"}
+
+def test_action_path_is_sorted_by_confidence(index):
+    index.publish([rec("cardano", "BUY", 0.95)])
+    assert [r.coin for r in index.query(action="buy")] == ["cardano", "solana"]
+    assert index.query(action="SELL", coin="ethereum")[0].confidence == 0.4
+    assert index.query(action="SELL", coin="bitcoin") == []
+
+def test_confidence_filters(index):
+    assert {r.coin for r in index.query(min_confidence=0.5)} == {"bitcoin", "solana"}
+    assert [r.coin for r in index.query(min_confidence=0.5, max_confidence=0.8)] == ["bitcoin"]
+
+def test_history_of_one_coin_is_newest_first(index):
+    assert [r.action for r in index.query(coin="bitcoin", include_history=True)] == ["HOLD", "BUY"]
+
+def test_history_across_coins_is_ordered_by_publish_time(index):
+    index.publish([rec("ethereum", "BUY", 0.8)])
+    newest = index.query(include_history=True, limit=2)
+    assert [(r.coin, r.action) for r in newest] == [("ethereum", "BUY"), ("bitcoin", "HOLD")]
+    assert len(index.query(include_history=True)) == 5
+
+def test_users_are_separate(index):
+    index.publish([rec("bitcoin", "SELL")], user="alice")
+    assert [r.action for r in index.query(user="alice")] == ["SELL"]
+    assert index.query(user="bob") == []
+
+def test_history_limit():
+    index = RecommendationIndex(history_limit=2)
+    for action in ("BUY", "SELL", "HOLD"):
+        index.publish([rec("bitcoin", action)])
+    assert [r.action for r in index.query(coin="bitcoin", include_history=True)] == ["HOLD", "SELL"]
+
+@pytest.mark.parametrize("limit", [0, -1])
+def test_limit_below_one_is_rejected(index, limit):
+    with pytest.raises(ValueError):
+        index.query(limit=limit)
+
+def test_limit(index):
+    assert len(index.query(limit=1)) == 1
+    assert len(index.query(include_history=True, limit=3)) == 3
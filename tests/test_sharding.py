@@ -0,0 +1,86 @@
+from shared.sharding import HashRing, ShardTracker
+
+COINS = [f"coin-{i}" for i in range(12)]
+
+def respond(tracker, replica, keys):
+    """Answers a request with one part per coin, like a market data replica"""
+    return tracker.receive(replica, list(keys), keys)
+
+def test_ring_only_moves_keys_of_removed_replica():
+    ring = HashRing(["a", "b", "c"])
+    keys = [f"key-{i}" for i in range(1000)]
+    before = {key: ring.owner(key) for key in keys}
+    ring.remove("b")
+    moved = [key for key in keys if ring.owner(key) != before[key]]
+    assert moved and all(before[key] == "b" for key in moved)
+
+def test_reassigned_keys_survive_original_reply_of_pending_replica():
+    tracker = ShardTracker(["a", "b", "c"], timeout=10)
+    shards = tracker.dispatch(COINS, now=0)
+    assert len(shards) == 3
+    silent, *alive = sorted(shards)
+    # The silent replica's request went out earlier than the others
+    tracker.pending[silent] = [(keys, -5) for keys, _ in tracker.pending[silent]]
+
+    # The other replicas are still pending when the silent one times out
+    reassigned = tracker.expire(now=5)
+    assert set(reassigned) <= set(alive)
+    assert sorted(sum(reassigned.values(), [])) == sorted(shards[silent])
+
+    # The original replies arrive, but the reassigned coins are still owed
+    for replica in alive:
+        complete = respond(tracker, replica, shards[replica])
+    assert not complete
+    assert not tracker.complete
+
+    for replica, keys in reassigned.items():
+        complete = respond(tracker, replica, keys)
+    assert complete
+    assert sorted(tracker.parts) == sorted(COINS)
+
+def test_reassignment_keeps_deadline_of_original_request():
+    tracker = ShardTracker(["a", "b", "c"], timeout=10)
+    shards = tracker.dispatch(COINS, now=0)
+    silent, slow, fast = sorted(shards)
+    tracker.pending[silent] = [(keys, -5) for keys, _ in tracker.pending[silent]]
+    assert not respond(tracker, fast, shards[fast])
+
+    tracker.expire(now=5)
+    # slow got a new request, but its original one is still due at t=10
+    assert slow in tracker.pending and slow not in tracker.dead
+    tracker.expire(now=10)
+    assert slow in tracker.dead
+
+def test_replies_nobody_waits_for_are_ignored():
+    tracker = ShardTracker(["a", "b"], timeout=10)
+    shards = tracker.dispatch(COINS, now=0)
+    first, second = sorted(shards)
+
+    assert not respond(tracker, "stranger", ["coin-0"])
+    assert not respond(tracker, first, ["not-requested"])
+    assert not respond(tracker, first, shards[first] + ["extra"])
+    assert tracker.parts == []
+
+    assert not respond(tracker, first, shards[first])
+    # Duplicate reply
+    assert not respond(tracker, first, shards[first])
+    assert sorted(tracker.parts) == sorted(shards[first])
+
+def test_late_reply_from_dead_replica_is_not_merged_but_restores_it():
+    tracker = ShardTracker(["a", "b"], timeout=10)
+    shards = tracker.dispatch(COINS, now=0)
+    silent, alive = sorted(shards)
+    assert not respond(tracker, alive, shards[alive])
+    tracker.expire(now=10)
+    assert silent in tracker.dead
+
+    assert not respond(tracker, silent, shards[silent])
+    assert silent not in tracker.dead and silent in tracker.ring.replicas
+    assert sorted(tracker.parts) == sorted(shards[alive])
+
+def test_reply_for_keys_nobody_requested_is_ignored():
+    tracker = ShardTracker(["a"], timeout=10)
+    tracker.dispatch(COINS, now=0)
+    assert respond(tracker, "a", COINS[:3]) is False
+    assert tracker.parts == [] and "a" in tracker.pending
+    assert respond(tracker, "a", COINS) is True